@@ -6,7 +6,9 @@ except PackageNotFoundError:
     __version__ = "0.1.1"
 
 from .data import load_match_data, clean_data, data_profiling
-from .metrics import result_stats, team_performance, get_all_teams, each_team_performance, win_percentage, each_win_percentage, pythagorean_expectation, each_pythagorean_expectation, logistic_regression_prediction, predict_match_outcome, season_half_prediction
+from .metrics import result_stats, team_performance, get_all_teams, each_team_performance, win_percentage, each_win_percentage, pythagorean_expectation, each_pythagorean_expectation, logistic_regression_prediction, predict_match_outcome, season_half_prediction, compute_by_group, fit_goal_model, scoreline_probabilities, goal_market_probabilities
+from .features import PreMatchFeatureBuilder, build_prematch_features
+from .backtest import walk_forward_backtest
 from .visualization import plot_result_distribution, plot_team_results, plot_league_points_table, plot_goal_difference_distribution, plot_win_percentage_comparison, plot_pythagorean_expectation
 
 __all__ = [
@@ -24,6 +26,13 @@ __all__ = [
     "logistic_regression_prediction",
     "predict_match_outcome",
     "season_half_prediction",
+    "compute_by_group",
+    "fit_goal_model",
+    "scoreline_probabilities",
+    "goal_market_probabilities",
+    "PreMatchFeatureBuilder",
+    "build_prematch_features",
+    "walk_forward_backtest",
     "plot_result_distribution",
     "plot_team_results",
     "plot_league_points_table",
@@ -0,0 +1,26 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+
+_worker_frame = None
+
+def _init_worker(frame: pd.DataFrame) -> None:
+    # Stores the shared match data once per worker process, so tasks only carry row ranges
+    global _worker_frame
+    _worker_frame = frame
+
+def _run_tasks(frame: pd.DataFrame, func, tasks: list, workers: int | None) -> list:
+    # Runs func(frame, task) for every task, serially or over a process pool sharing one copy of frame per worker
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(tasks) <= 1:
+        return [func(frame, task) for task in tasks]
+
+    workers = min(workers, len(tasks))
+    chunksize = max(1, len(tasks) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(frame,)) as pool:
+        return list(pool.map(_call_with_worker_frame, [(func, task) for task in tasks], chunksize=chunksize))
+
+def _call_with_worker_frame(job: tuple):
+    func, task = job
+    return func(_worker_frame, task)
@@ -0,0 +1,252 @@
+import numpy as np
+import pandas as pd
+from typing import Literal
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import log_loss
+from sklearn.preprocessing import StandardScaler
+from .features import PreMatchFeatureBuilder, _match_dates
+from ._parallel import _run_tasks
+from .metrics import fit_goal_model, scoreline_probabilities, goal_market_probabilities
+
+_OUTCOMES = ['H', 'D', 'A']
+
+def _matchdays(df: pd.DataFrame, season_cols: list[str]) -> np.ndarray:
+    # Matchday of a match = the larger of the two teams' match counts within the season, with matches in date order
+    position = np.arange(len(df))
+    season = df[season_cols].astype(str).agg("|".join, axis=1).to_numpy() if season_cols else np.zeros(len(df))
+    long = pd.DataFrame({
+        'Match': np.concatenate([position, position]),
+        'Season': np.concatenate([season, season]),
+        'Team': np.concatenate([df['HomeTeam'].to_numpy(), df['AwayTeam'].to_numpy()]),
+    })
+    long = long.sort_values(by='Match', kind="stable")
+    long['MatchNumber'] = long.groupby(['Season', 'Team'], sort=False).cumcount() + 1
+    return long.groupby('Match', sort=True)['MatchNumber'].max().to_numpy()
+
+def _fold_ids(df: pd.DataFrame, dates: pd.Series, fold_by: str, step: int, season_cols: list[str]) -> np.ndarray:
+    # Expects df and dates in date order; the returned fold ids are non-decreasing along it
+    if fold_by == "date":
+        # Periods without matches (e.g. winter breaks) do not form empty folds
+        days = (dates - dates.min()).dt.days.to_numpy()
+        return pd.factorize(days // step, sort=True)[0]
+
+    # Seasons ordered by their first match, then blocks of `step` matchdays within each season
+    if 'Season' in df.columns:
+        season_start = dates.groupby(df['Season'].to_numpy()).transform("min")
+        season_order = pd.factorize(season_start, sort=True)[0]
+    else:
+        season_order = np.zeros(len(df), dtype=int)
+    blocks = (_matchdays(df, season_cols) - 1) // step
+    folds = pd.factorize(pd.MultiIndex.from_arrays([season_order, blocks]), sort=True)[0]
+
+    # Postponed matches are played after later matchdays: they join the fold running at their date, so no fold
+    # is trained on matches played after it starts, and matches on the same date always share a fold.
+    # With several divisions, the division furthest ahead in its matchdays therefore sets the fold boundaries
+    folds = np.maximum.accumulate(folds)
+    folds = pd.Series(folds).groupby(dates.to_numpy()).transform("max").to_numpy()
+    return pd.factorize(folds, sort=True)[0]
+
+def _predict_logistic(train: pd.DataFrame, test: pd.DataFrame, feature_columns: list[str], C: float = 1.0) -> np.ndarray:
+    if train['FTR'].nunique() < 2:
+        frequencies = train['FTR'].value_counts(normalize=True).reindex(_OUTCOMES, fill_value=0.0).to_numpy()
+        return np.tile(frequencies, (len(test), 1))
+
+    scaler = StandardScaler()
+    X_train = scaler.fit_transform(train[feature_columns])
+    X_test = scaler.transform(test[feature_columns])
+
+    model = LogisticRegression(solver='lbfgs', max_iter=1000, C=C)
+    model.fit(X_train, train['FTR'])
+
+    # Outcomes missing from the training window get zero probability
+    probs = np.zeros((len(test), len(_OUTCOMES)))
+    for col, outcome in enumerate(model.classes_):
+        probs[:, _OUTCOMES.index(outcome)] = model.predict_proba(X_test)[:, col]
+    return probs
+
+def _predict_goal_model(train: pd.DataFrame, test: pd.DataFrame, feature_columns: list[str], **params) -> np.ndarray:
+    max_goals = params.pop("max_goals", 10)
+    model = fit_goal_model(train, **params)
+
+    # Teams without matches in the training window (e.g. promoted teams) get average ratings
+    teams = np.union1d(model["teams"], np.union1d(test['HomeTeam'].astype(str), test['AwayTeam'].astype(str)))
+    model = dict(model, teams=teams, attack=model["attack"].reindex(teams, fill_value=0.0), defence=model["defence"].reindex(teams, fill_value=0.0))
+
+    scorelines = scoreline_probabilities(model, test['HomeTeam'], test['AwayTeam'], max_goals=max_goals)
+    markets = goal_market_probabilities(scorelines, totals=())
+    probs = markets[["HomeWin", "Draw", "AwayWin"]].to_numpy(copy=True)
+
+    # Fixtures whose scoreline probabilities all underflow get the outcome frequencies of the training window
+    total = probs.sum(axis=1, keepdims=True)
+    valid = np.isfinite(total[:, 0]) & (total[:, 0] > 0)
+    probs[valid] = probs[valid] / total[valid]
+    probs[~valid] = train['FTR'].value_counts(normalize=True).reindex(_OUTCOMES, fill_value=0.0).to_numpy()
+    return probs
+
+_MODELS = {
+    "logistic": _predict_logistic,
+    "goal_model": _predict_goal_model,
+}
+
+def _backtest_fold(frame: pd.DataFrame, task: tuple) -> tuple:
+    fold, train_start, test_start, test_end, model, model_params, feature_columns = task
+    train = frame.iloc[train_start:test_start]
+    test = frame.iloc[test_start:test_end]
+
+    predict = _MODELS[model] if isinstance(model, str) else model
+    probs = predict(train, test, feature_columns, **model_params)
+    return fold, train_start, test_start, test_end, np.asarray(probs, dtype=float)
+
+def _calibration_table(probs: np.ndarray, actual: np.ndarray, n_bins: int) -> pd.DataFrame:
+    # One-vs-rest reliability table over the probabilities of all three outcomes
+    if not np.all(np.isfinite(probs)) or np.any(probs < 0) or np.any(probs > 1):
+        raise ValueError("Predicted probabilities must be finite values between 0 and 1.")
+    predicted = probs.ravel()
+    observed = (actual[:, None] == np.arange(len(_OUTCOMES))[None, :]).ravel()
+    bins = np.minimum((predicted * n_bins).astype(int), n_bins - 1)
+
+    count = np.bincount(bins, minlength=n_bins)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_predicted = np.bincount(bins, predicted, n_bins) / count
+        observed_frequency = np.bincount(bins, observed, n_bins) / count
+
+    return pd.DataFrame({
+        'BinLower': np.arange(n_bins) / n_bins,
+        'BinUpper': np.arange(1, n_bins + 1) / n_bins,
+        'MeanPredicted': mean_predicted,
+        'ObservedFrequency': observed_frequency,
+        'Count': count
+    })
+
+def _scores(probs: np.ndarray, actual: np.ndarray, n_bins: int) -> dict:
+    onehot = np.eye(len(_OUTCOMES))[actual]
+    calibration = _calibration_table(probs, actual, n_bins)
+    filled = calibration['Count'] > 0
+    calibration_error = np.sum(
+        np.abs(calibration['MeanPredicted'] - calibration['ObservedFrequency'])[filled] * calibration['Count'][filled]
+    ) / calibration['Count'].sum()
+
+    return {
+        'Accuracy': float(np.mean(np.argmax(probs, axis=1) == actual)),
+        'LogLoss': float(log_loss(actual, np.clip(probs, 1e-15, 1.0), labels=[0, 1, 2])),
+        'Brier': float(np.mean(np.sum((probs - onehot) ** 2, axis=1))),
+        'CalibrationError': float(calibration_error)
+    }
+
+def walk_forward_backtest(df: pd.DataFrame, model="logistic", fold_by: Literal["matchday", "date"] = "matchday", step: int = 1, window: Literal["expanding", "rolling"] = "expanding", train_folds: int | None = None, min_train_folds: int = 1, model_params: dict | None = None, feature_window: int = 5, n_bins: int = 10, workers: int | None = None) -> dict:
+
+    """
+    Evaluates a match outcome model with walk-forward backtesting across one or more seasons.
+
+    The matches are split into consecutive folds of `step` matchdays or days. Every fold is predicted by a model trained
+    only on the folds before it: all of them ('expanding') or the last `train_folds` ('rolling'). The pre-match features
+    (see `PreMatchFeatureBuilder`) are computed once, shared by all folds, and the folds run in parallel over a process pool.
+
+    Args:
+        df (pd.DataFrame): DataFrame containing match data with 'Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'FTR' columns, optionally 'Div' and 'Season'
+        model (str | callable): the model to evaluate
+            - "logistic": multinomial logistic regression on the pre-match features (default)
+            - "goal_model": goal model of `fit_goal_model()`, teams without training matches get average ratings
+            - a function `model(train, test, feature_columns, **model_params)` returning an array of (Home Win, Draw, Away Win) probabilities for the test rows;
+              it must be defined at module level to run in worker processes
+        fold_by (str): unit of the folds, "matchday" (matchdays within each 'Season', default) or "date" (days).
+            Matchday folds are cut in date order: a postponed match joins the fold running when it is played.
+            With several divisions in one season the folds stay in date order across divisions, so `step` counts the matchdays
+            of the league that plays them fastest; run one backtest per 'Div' for folds of each league's own matchdays.
+            Data covering more than one season needs a 'Season' column for matchday folds
+        step (int): number of matchdays or days in a fold, default is 1
+        window (str): training window, "expanding" (default) or "rolling"
+        train_folds (int): number of previous folds in a rolling training window
+        min_train_folds (int): number of folds used only for training before the first evaluated fold, default is 1
+        model_params (dict): keyword arguments of the model, e.g. {"C": 0.5} for "logistic" or {"dixon_coles": True, "xi": 0.002} for "goal_model"
+        feature_window (int): number of previous matches used for the rolling pre-match features, default is 5;
+            win percentage and Pythagorean Expectation restart for every 'Div' and 'Season' present in the data
+        n_bins (int): number of probability bins of the calibration table, default is 10
+        workers (int): number of worker processes, default is the number of CPUs; 1 runs serially.
+            With more than one worker, scripts on Windows and macOS (spawn start method) must call this function under an `if __name__ == "__main__":` guard, otherwise the worker processes raise a RuntimeError
+
+    Returns:
+        dict: a dictionary containing the backtest results, structured as:
+            {
+                'folds': pd.DataFrame,        # one row per evaluated fold with its date range, sizes, 'Accuracy', 'LogLoss', 'Brier' and 'CalibrationError'
+                'predictions': pd.DataFrame,  # 'Date', 'HomeTeam', 'AwayTeam', 'FTR', 'Fold' and the 'HomeWin', 'Draw', 'AwayWin' probabilities of every evaluated match
+                'calibration': pd.DataFrame,  # reliability table over all predictions
+                'summary': dict               # 'Accuracy', 'LogLoss', 'Brier' and 'CalibrationError' over all predictions
+            }
+
+    Raises:
+        ValueError: if required columns are missing, an option is unknown, there are not enough folds or the model returns invalid probabilities
+    """
+    required_columns = ['Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'FTR']
+    missing_columns = [col for col in required_columns if col not in df.columns]
+    if missing_columns:
+        raise ValueError(f"Missing required columns: {missing_columns}")
+    if isinstance(model, str) and model not in _MODELS:
+        raise ValueError(f"Unknown model: {model}. Available models: {list(_MODELS)}")
+    if fold_by not in ("matchday", "date"):
+        raise ValueError(f"Unknown fold_by option: {fold_by}")
+    if window not in ("expanding", "rolling"):
+        raise ValueError(f"Unknown window option: {window}")
+    if window == "rolling" and (train_folds is None or train_folds < 1):
+        raise ValueError("A rolling window requires train_folds of at least 1.")
+    if step < 1 or min_train_folds < 1:
+        raise ValueError("step and min_train_folds must be at least 1.")
+
+    # Matches in date order, with the leak-free pre-match features computed once for all folds
+    df = df.dropna(subset=required_columns)
+    df = df[df['FTR'].isin(_OUTCOMES)]
+    dates = _match_dates(df)
+    order = np.argsort(dates.to_numpy(), kind="stable")
+    df, dates = df.iloc[order], dates.iloc[order]
+    if fold_by == "matchday" and 'Season' not in df.columns and (dates.max() - dates.min()).days > 365:
+        raise ValueError("Matchday folds over more than one season require a 'Season' column.")
+
+    season_cols = [col for col in ['Div', 'Season'] if col in df.columns]
+    builder = PreMatchFeatureBuilder(window=feature_window, group_cols=season_cols)
+    frame = builder.update(df).reset_index(drop=True)
+    frame['Date'] = dates.to_numpy()
+    folds = _fold_ids(df, dates.reset_index(drop=True), fold_by, step, season_cols)
+
+    # Fold ids are non-decreasing in date order, so every training window and test fold is a contiguous row range
+    bounds = np.searchsorted(folds, np.arange(folds.max() + 2))
+
+    if folds.max() + 1 <= min_train_folds:
+        raise ValueError(f"Not enough folds: {folds.max() + 1} folds for {min_train_folds} training folds.")
+
+    model_params = {} if model_params is None else dict(model_params)
+    tasks = []
+    for fold in range(min_train_folds, folds.max() + 1):
+        first_train_fold = max(0, fold - train_folds) if window == "rolling" else 0
+        tasks.append((fold, bounds[first_train_fold], bounds[fold], bounds[fold + 1], model, model_params, builder.feature_columns))
+
+    results = _run_tasks(frame, _backtest_fold, tasks, workers)
+
+    actual_all, probs_all, fold_rows, prediction_parts = [], [], [], []
+    for fold, train_start, test_start, test_end, probs in results:
+        test = frame.iloc[test_start:test_end]
+        actual = test['FTR'].map({outcome: idx for idx, outcome in enumerate(_OUTCOMES)}).to_numpy()
+        actual_all.append(actual)
+        probs_all.append(probs)
+
+        fold_rows.append({
+            'Fold': fold,
+            'TrainStart': frame['Date'].iloc[train_start],
+            'TestStart': test['Date'].iloc[0],
+            'TestEnd': test['Date'].iloc[-1],
+            'TrainMatches': test_start - train_start,
+            'TestMatches': test_end - test_start,
+            **_scores(probs, actual, n_bins)
+        })
+
+        part = test[['Date', 'HomeTeam', 'AwayTeam', 'FTR']].copy()
+        part['Fold'] = fold
+        part[['HomeWin', 'Draw', 'AwayWin']] = probs
+        prediction_parts.append(part)
+
+    actual_all, probs_all = np.concatenate(actual_all), np.concatenate(probs_all)
+    return {
+        "folds": pd.DataFrame(fold_rows),
+        "predictions": pd.concat(prediction_parts, ignore_index=True),
+        "calibration": _calibration_table(probs_all, actual_all, n_bins),
+        "summary": _scores(probs_all, actual_all, n_bins)
+    }
@@ -0,0 +1,229 @@
+import numpy as np
+import pandas as pd
+
+_CUMULATIVE_COLUMNS = ['Matches', 'Wins', 'GoalsFor', 'GoalsAgainst']
+_SHOT_COLUMNS = ['HS', 'HST', 'AS', 'AST']
+
+def _match_dates(df: pd.DataFrame) -> pd.Series:
+    # Football-data files store dates as day/month/year strings unless clean_data() already converted them
+    if 'Date' not in df.columns:
+        return pd.Series(pd.NaT, index=df.index)
+    if pd.api.types.is_datetime64_any_dtype(df['Date']):
+        return df['Date']
+    return pd.to_datetime(df['Date'], dayfirst=True, errors="coerce")
+
+def _long_format(df: pd.DataFrame, with_shots: bool) -> pd.DataFrame:
+    # One row per team and match, from the perspective of that team, in match order
+    order = np.arange(len(df))
+    home = pd.DataFrame({
+        'Match': order,
+        'Side': 0,
+        'Team': df['HomeTeam'].to_numpy(),
+        'Matches': 1,
+        'Wins': (df['FTR'] == 'H').to_numpy(dtype=int),
+        'GoalsFor': df['FTHG'].to_numpy(),
+        'GoalsAgainst': df['FTAG'].to_numpy(),
+        'Points': df['FTR'].map({'H': 3, 'D': 1, 'A': 0}).to_numpy(),
+    })
+    away = pd.DataFrame({
+        'Match': order,
+        'Side': 1,
+        'Team': df['AwayTeam'].to_numpy(),
+        'Matches': 1,
+        'Wins': (df['FTR'] == 'A').to_numpy(dtype=int),
+        'GoalsFor': df['FTAG'].to_numpy(),
+        'GoalsAgainst': df['FTHG'].to_numpy(),
+        'Points': df['FTR'].map({'H': 0, 'D': 1, 'A': 3}).to_numpy(),
+    })
+    if with_shots:
+        home['Shots'], home['ShotsOnTarget'] = df['HS'].to_numpy(), df['HST'].to_numpy()
+        home['ShotsConceded'], home['ShotsOnTargetConceded'] = df['AS'].to_numpy(), df['AST'].to_numpy()
+        away['Shots'], away['ShotsOnTarget'] = df['AS'].to_numpy(), df['AST'].to_numpy()
+        away['ShotsConceded'], away['ShotsOnTargetConceded'] = df['HS'].to_numpy(), df['HST'].to_numpy()
+
+    return pd.concat([home, away], ignore_index=True).sort_values(by=['Match', 'Side'], kind="stable").reset_index(drop=True)
+
+class PreMatchFeatureBuilder:
+
+    """
+    Builds leak-free pre-match features for match outcome models.
+
+    For every match, the features only use the matches each team played before it: win percentage, Pythagorean Expectation,
+    form (average points over the last `window` matches) and, if the 'HS', 'HST', 'AS', 'AST' columns are available,
+    average shots and shots on target for and against over the last `window` matches.
+    The builder keeps running totals and the last `window` matches of every team, so appending a matchday with `update()` only computes the new rows.
+
+    By default the win percentage and Pythagorean Expectation accumulate over the team's whole match history. With `group_cols`
+    (e.g. ['Div', 'Season'], as in `compute_by_group()`) they restart for every group, giving season-level values.
+    The rolling features always use the team's last `window` matches, also across group boundaries.
+
+    Args:
+        window (int): number of previous matches used for the rolling features, default is 5
+        exponent (float): exponent value for the Pythagorean Expectation, default is 2.0
+        group_cols (list[str]): columns identifying a group (e.g. league-season) the cumulative features restart in, default is None (whole history)
+
+    Example:
+        >>> builder = PreMatchFeatureBuilder(window=5)
+        >>> features = builder.update(df)
+        >>> new_features = builder.update(next_matchday_df)
+    """
+
+    def __init__(self, window: int = 5, exponent: float = 2.0, group_cols: list[str] | None = None):
+        if window < 1:
+            raise ValueError("window must be at least 1.")
+        self.window = window
+        self.exponent = exponent
+        self.group_cols = list(group_cols) if group_cols else []
+        self.with_shots = None
+        self._totals = pd.DataFrame(columns=_CUMULATIVE_COLUMNS, dtype=float)
+        self._history = None
+        self._last_date = None
+
+    @property
+    def rolling_columns(self) -> list[str]:
+        columns = ['Points']
+        if self.with_shots:
+            columns += ['Shots', 'ShotsOnTarget', 'ShotsConceded', 'ShotsOnTargetConceded']
+        return columns
+
+    @property
+    def feature_columns(self) -> list[str]:
+        """
+        Names of the feature columns added by `update()`, in the order they appear.
+        """
+        team_features = ['MatchesPlayed', 'WinPercentage', 'PythagoreanExpectation', 'Form']
+        if self.with_shots:
+            team_features += ['AvgShots', 'AvgShotsOnTarget', 'AvgShotsConceded', 'AvgShotsOnTargetConceded']
+        columns = [f"Home_{name}" for name in team_features] + [f"Away_{name}" for name in team_features]
+        return columns + ['GoalDifference']
+
+    def update(self, df: pd.DataFrame) -> pd.DataFrame:
+
+        """
+        Computes the pre-match features for new matches and adds them to the builder's history.
+
+        The first call processes the full match history; later calls only need the newly played matches, which must not be older than the matches already processed.
+
+        Args:
+            df (pd.DataFrame): DataFrame containing match data with 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'FTR' and the `group_cols` columns, optionally 'Date' and 'HS', 'HST', 'AS', 'AST'
+
+        Returns:
+            pd.DataFrame: copy of `df` with the feature columns appended, see `feature_columns`
+            The columns shared with `logistic_regression_prediction()` keep its names:
+                - 'Home_WinPercentage', 'Away_WinPercentage': win percentage before the match
+                - 'Home_PythagoreanExpectation', 'Away_PythagoreanExpectation': Pythagorean Expectation before the match
+                - 'GoalDifference': difference of the two Pythagorean Expectations
+            'Home_MatchesPlayed' and 'Away_MatchesPlayed' count the matches behind the win percentage and Pythagorean Expectation,
+            so a team without history (0 matches, win percentage 0.0, Pythagorean Expectation 0.5) can be told apart from a losing one.
+            Form and the shot averages are 0.0 when the team has not played before.
+
+        Raises:
+            ValueError: if required columns are missing or the new matches are older than the already processed ones
+        """
+        required_columns = ['HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'FTR'] + self.group_cols
+        missing_columns = [col for col in required_columns if col not in df.columns]
+        if missing_columns:
+            raise ValueError(f"Missing required columns: {missing_columns}")
+
+        has_shots = all(col in df.columns for col in _SHOT_COLUMNS)
+        if self.with_shots is None:
+            self.with_shots = has_shots
+        elif self.with_shots and not has_shots:
+            raise ValueError(f"Missing required columns: {[col for col in _SHOT_COLUMNS if col not in df.columns]}")
+
+        dates = _match_dates(df)
+        if self._last_date is not None and (dates < self._last_date).any():
+            raise ValueError("New matches must not be older than the matches already processed.")
+
+        # Process matches in date order, keeping the original order for matches on the same day
+        order = np.argsort(dates.to_numpy(), kind="stable")
+        matches = df.iloc[order]
+        long = _long_format(matches, self.with_shots)
+        long['Key'] = long['Team'].astype(str)
+        if self.group_cols:
+            group_key = matches[self.group_cols].astype(str).agg("|".join, axis=1).to_numpy()
+            long['Key'] = group_key[long['Match'].to_numpy()] + "|" + long['Key']
+
+        # Cumulative statistics before each match: exclusive cumsum within the batch plus the totals of earlier batches
+        cumulative = long.groupby('Key', sort=False)[_CUMULATIVE_COLUMNS].cumsum() - long[_CUMULATIVE_COLUMNS]
+        previous = self._totals.reindex(long['Key']).fillna(0.0).to_numpy()
+        cumulative = cumulative + previous
+
+        rolling = self._rolling_means(long)
+
+        played = cumulative['Matches'].to_numpy()
+        win_pct = np.divide(cumulative['Wins'].to_numpy(), played, out=np.zeros(len(long)), where=played > 0)
+        gf_exp = cumulative['GoalsFor'].to_numpy(dtype=float) ** self.exponent
+        ga_exp = cumulative['GoalsAgainst'].to_numpy(dtype=float) ** self.exponent
+        total = gf_exp + ga_exp
+        # Without goals there is no evidence either way, so the Pythagorean Expectation starts from the neutral 0.5
+        pyth = np.divide(gf_exp, total, out=np.full(len(long), 0.5), where=total > 0)
+
+        team_features = pd.DataFrame({'MatchesPlayed': played, 'WinPercentage': win_pct, 'PythagoreanExpectation': pyth, 'Form': rolling['Points']})
+        if self.with_shots:
+            team_features['AvgShots'] = rolling['Shots']
+            team_features['AvgShotsOnTarget'] = rolling['ShotsOnTarget']
+            team_features['AvgShotsConceded'] = rolling['ShotsConceded']
+            team_features['AvgShotsOnTargetConceded'] = rolling['ShotsOnTargetConceded']
+
+        home_rows = (long['Side'] == 0).to_numpy()
+        home_features = team_features[home_rows].add_prefix('Home_').set_index(long.loc[home_rows, 'Match'].to_numpy())
+        away_features = team_features[~home_rows].add_prefix('Away_').set_index(long.loc[~home_rows, 'Match'].to_numpy())
+        features = pd.concat([home_features, away_features], axis=1).sort_index()
+        features['GoalDifference'] = features['Home_PythagoreanExpectation'] - features['Away_PythagoreanExpectation']
+
+        # Map the features from processing order back to the rows of df
+        values = features[self.feature_columns].to_numpy()[np.argsort(order)]
+        result = pd.concat([df, pd.DataFrame(values, index=df.index, columns=self.feature_columns)], axis=1)
+
+        self._store_state(long, dates)
+        return result
+
+    def _rolling_means(self, long: pd.DataFrame) -> pd.DataFrame:
+        # Mean of the previous `window` values per team, prepending the stored tail of earlier batches
+        columns = self.rolling_columns
+        if self._history is not None and len(self._history):
+            combined = pd.concat([self._history, long[['Team'] + columns]], ignore_index=True)
+        else:
+            combined = long[['Team'] + columns].reset_index(drop=True)
+
+        values = combined[columns].astype(float).fillna(0.0)
+        grouped = values.groupby(combined['Team'], sort=False)
+        prior_sum = grouped.cumsum() - values
+        window_start = prior_sum.groupby(combined['Team'], sort=False).shift(self.window).fillna(0.0)
+        count = np.minimum(combined.groupby('Team', sort=False).cumcount().to_numpy(), self.window)
+
+        means = (prior_sum - window_start).to_numpy()
+        means = np.divide(means, count[:, None], out=np.zeros_like(means), where=count[:, None] > 0)
+        return pd.DataFrame(means[-len(long):], columns=columns)
+
+    def _store_state(self, long: pd.DataFrame, dates: pd.Series) -> None:
+        batch_totals = long.groupby('Key', sort=False)[_CUMULATIVE_COLUMNS].sum()
+        self._totals = batch_totals.add(self._totals, fill_value=0.0)
+
+        history = long[['Team'] + self.rolling_columns]
+        if self._history is not None:
+            history = pd.concat([self._history, history], ignore_index=True)
+        self._history = history.groupby('Team', sort=False).tail(self.window).reset_index(drop=True)
+
+        if dates.notna().any():
+            batch_last = dates.max()
+            self._last_date = batch_last if self._last_date is None else max(self._last_date, batch_last)
+
+def build_prematch_features(df: pd.DataFrame, window: int = 5, exponent: float = 2.0, group_cols: list[str] | None = None) -> pd.DataFrame:
+
+    """
+    Computes leak-free pre-match features for every match in the dataset.
+
+    Shortcut for `PreMatchFeatureBuilder(window, exponent, group_cols).update(df)`, see `PreMatchFeatureBuilder` for the computed features.
+
+    Args:
+        df (pd.DataFrame): DataFrame containing match data with 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'FTR' columns, optionally 'Date' and 'HS', 'HST', 'AS', 'AST'
+        window (int): number of previous matches used for the rolling features, default is 5
+        exponent (float): exponent value for the Pythagorean Expectation, default is 2.0
+        group_cols (list[str]): columns identifying a group the cumulative features restart in, default is None (whole history)
+
+    Returns:
+        pd.DataFrame: copy of `df` with the pre-match feature columns appended
+    """
+    return PreMatchFeatureBuilder(window=window, exponent=exponent, group_cols=group_cols).update(df)
@@ -5,6 +5,12 @@ from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import accuracy_score, confusion_matrix
 from imblearn.over_sampling import SMOTE
 from sklearn.preprocessing import StandardScaler
+from typing import Literal
+from scipy.optimize import minimize
+from scipy.special import gammaln
+from scipy.stats import poisson
+from .features import PreMatchFeatureBuilder, _match_dates
+from ._parallel import _run_tasks
 
 def result_stats(df: pd.DataFrame) -> dict:
 
@@ -251,58 +257,141 @@ def each_pythagorean_expectation(df: pd.DataFrame, exponent: float = 2.0) -> pd.
     result_df = pd.DataFrame(list(pyth_expectations.items()), columns=['Team', 'PythagoreanExpectation'])
     return result_df
 
-def logistic_regression_prediction(df: pd.DataFrame) -> dict:
+_GROUP_METRICS = {
+    "each_team_performance": each_team_performance,
+    "each_win_percentage": each_win_percentage,
+    "each_pythagorean_expectation": each_pythagorean_expectation,
+}
+
+def _group_metrics(frame: pd.DataFrame, task: tuple) -> pd.DataFrame:
+    keys, start, stop, group_cols, metrics = task
+    partition = frame.iloc[start:stop]
+
+    result = None
+    for name in metrics:
+        metric_df = _GROUP_METRICS[name](partition)
+        result = metric_df if result is None else result.merge(metric_df, on="Team", how="outer")
+
+    for col, value in reversed(list(zip(group_cols, keys))):
+        result.insert(0, col, value)
+    return result
+
+def compute_by_group(df: pd.DataFrame, group_cols: list[str] | None = None, metrics: list[str] | None = None, workers: int | None = None) -> pd.DataFrame:
+
+    """
+    Computes team metrics separately for every group (e.g. league-season) of the match data, in parallel.
+
+    The match data is sorted by the group columns and handed to each worker process once, so every task only carries the row range of its group instead of a pickled copy of the data.
+
+    Args:
+        df (pd.DataFrame): DataFrame containing match data with 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'FTR' columns and the group columns
+        group_cols (list[str]): columns identifying a group, default is ['Div', 'Season']
+        metrics (list[str]): names of the metrics to compute, any of 'each_team_performance', 'each_win_percentage' and 'each_pythagorean_expectation', default is all of them
+        workers (int): number of worker processes, default is the number of CPUs; 1 runs serially.
+            With more than one worker, scripts on Windows and macOS (spawn start method) must call this function under an `if __name__ == "__main__":` guard, otherwise the worker processes raise a RuntimeError
+
+    Returns:
+        pd.DataFrame: DataFrame with the group columns, 'Team' and the columns of the requested metrics, one row per team and group
+        Rows with a missing group value form their own group, with NaN in that group column
+
+    Raises:
+        ValueError: if required columns are missing or an unknown metric is requested
+    """
+    if metrics is None:
+        metrics = list(_GROUP_METRICS)
+    unknown_metrics = [name for name in metrics if name not in _GROUP_METRICS]
+    if unknown_metrics:
+        raise ValueError(f"Unknown metrics: {unknown_metrics}. Available metrics: {list(_GROUP_METRICS)}")
+
+    group_cols = ['Div', 'Season'] if group_cols is None else list(group_cols)
+    required_columns = group_cols + ['HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'FTR']
+    missing_columns = [col for col in required_columns if col not in df.columns]
+    if missing_columns:
+        raise ValueError(f"Missing required columns: {missing_columns}")
+
+    # Only the needed columns are shared with the workers, sorted so that every group is a contiguous row range
+    data = df[required_columns].sort_values(by=group_cols, kind="stable").reset_index(drop=True)
+    groups = data.groupby(group_cols, sort=True, dropna=False).indices
+
+    tasks = []
+    for keys, idx in groups.items():
+        keys = keys if isinstance(keys, tuple) else (keys,)
+        tasks.append((keys, idx[0], idx[-1] + 1, group_cols, list(metrics)))
+
+    if not tasks:
+        return pd.DataFrame(columns=group_cols + ['Team'])
+
+    results = _run_tasks(data, _group_metrics, tasks, workers)
+    return pd.concat(results, ignore_index=True)
+
+def logistic_regression_prediction(df: pd.DataFrame, features: Literal["season", "pre_match"] = "season", window: int = 5) -> dict:
     """
     Predicts match outcomes (Win/Draw/Loss) using multinomial logistic regression with oversampling and additional features.
 
     Args:
         df (pd.DataFrame): DataFrame containing match data with necessary metrics calculated
+        features (str): which features to train on
+            - "season": win percentage and Pythagorean Expectation over the entire dataset (default)
+            - "pre_match": leak-free features from matches played before each match, see `build_prematch_features()`;
+              win percentage and Pythagorean Expectation restart for every 'Div' and 'Season' present in the data
+        window (int): number of previous matches used for the rolling "pre_match" features, default is 5
 
     Returns:
         dict: a dictionary containing model accuracy, confusion matrix, predictions, and the trained model
-    """
-    wpc = each_win_percentage(df)
-    pyth = each_pythagorean_expectation(df)
 
-    team_stats = pd.merge(wpc, pyth, on="Team", how="left")
-    df = df.merge(team_stats, left_on="HomeTeam", right_on="Team", how="left").rename(
-        columns={
-            "WinPercentage": "Home_WinPercentage",
-            "PythagoreanExpectation": "Home_PythagoreanExpectation"
-        }
-    )
-    df = df.merge(team_stats, left_on="AwayTeam", right_on="Team", how="left").rename(
-        columns={
-            "WinPercentage": "Away_WinPercentage",
-            "PythagoreanExpectation": "Away_PythagoreanExpectation"
-        }
-    )
+    Raises:
+        ValueError: if an unknown features option is given
+    """
+    if features == "season":
+        wpc = each_win_percentage(df)
+        pyth = each_pythagorean_expectation(df)
+
+        team_stats = pd.merge(wpc, pyth, on="Team", how="left")
+        df = df.merge(team_stats, left_on="HomeTeam", right_on="Team", how="left").rename(
+            columns={
+                "WinPercentage": "Home_WinPercentage",
+                "PythagoreanExpectation": "Home_PythagoreanExpectation"
+            }
+        )
+        df = df.merge(team_stats, left_on="AwayTeam", right_on="Team", how="left").rename(
+            columns={
+                "WinPercentage": "Away_WinPercentage",
+                "PythagoreanExpectation": "Away_PythagoreanExpectation"
+            }
+        )
 
-    df['GoalDifference'] = df['Home_PythagoreanExpectation'] - df['Away_PythagoreanExpectation']
+        df['GoalDifference'] = df['Home_PythagoreanExpectation'] - df['Away_PythagoreanExpectation']
+        feature_columns = [
+            "Home_WinPercentage", 
+            "Away_WinPercentage", 
+            "Home_PythagoreanExpectation", 
+            "Away_PythagoreanExpectation",
+            "GoalDifference"
+        ]
+    elif features == "pre_match":
+        builder = PreMatchFeatureBuilder(window=window, group_cols=[col for col in ['Div', 'Season'] if col in df.columns])
+        df = builder.update(df)
+        feature_columns = builder.feature_columns
+    else:
+        raise ValueError(f"Unknown features option: {features}")
 
     # Target variable: 2 for Home Win, 1 for Draw, 0 for Away Win
     df["Target"] = df["FTR"].map({"H": 2, "D": 1, "A": 0})
 
     # Features and target
-    X = df[[
-        "Home_WinPercentage", 
-        "Away_WinPercentage", 
-        "Home_PythagoreanExpectation", 
-        "Away_PythagoreanExpectation",
-        "GoalDifference"
-    ]]
+    X = df[feature_columns]
     y = df["Target"].astype(int)
 
     # Standardize the features
     scaler = StandardScaler()
     X = scaler.fit_transform(X)
 
-    # Apply SMOTE for oversampling the minority classes
-    smote = SMOTE(random_state=42)
-    X_resampled, y_resampled = smote.fit_resample(X, y)
-
     # Train-test split
-    X_train, X_test, y_train, y_test = train_test_split(X_resampled, y_resampled, test_size=0.3, random_state=42)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42)
+
+    # Apply SMOTE for oversampling the minority classes, on the training set only so synthetic rows never reach the test set
+    smote = SMOTE(random_state=42)
+    X_train, y_train = smote.fit_resample(X_train, y_train)
 
     # Multinomial Logistic Regression model with regularization
     model = LogisticRegression(solver='lbfgs', max_iter=1000, C=1.0)
@@ -314,9 +403,7 @@ def logistic_regression_prediction(df: pd.DataFrame) -> dict:
     conf_matrix = confusion_matrix(y_test, predictions, labels=[2, 1, 0])
 
     # Create a DataFrame with predictions and actual results
-    prediction_df = pd.DataFrame(X_test, columns=[
-        "Home_WinPercentage", "Away_WinPercentage", "Home_PythagoreanExpectation", "Away_PythagoreanExpectation", "GoalDifference"
-    ])
+    prediction_df = pd.DataFrame(X_test, columns=feature_columns)
     prediction_df["Actual"] = y_test.values
     prediction_df["Predicted"] = predictions
 
@@ -410,4 +497,254 @@ def season_half_prediction(df: pd.DataFrame) -> pd.DataFrame:
         )
     )
 
-    return second_half[["Date", "HomeTeam", "AwayTeam", "FTR", "Home_PythagoreanExpectation", "Away_PythagoreanExpectation", "PredictedOutcome"]]
\ No newline at end of file
+    return second_half[["Date", "HomeTeam", "AwayTeam", "FTR", "Home_PythagoreanExpectation", "Away_PythagoreanExpectation", "PredictedOutcome"]]
+
+_MIN_TAU = 1e-10
+
+def _goal_model_objective(params: np.ndarray, home_idx: np.ndarray, away_idx: np.ndarray, home_goals: np.ndarray, away_goals: np.ndarray, weights: np.ndarray, n_teams: int, dixon_coles: bool, ridge: float = 0.0) -> tuple[float, np.ndarray]:
+    # Negative weighted log-likelihood (without the constant factorial terms) plus a ridge penalty on the ratings, and its analytic gradient.
+    # Attack and defence ratings are constrained to sum to zero by deriving the last team's rating from the others.
+    n = n_teams - 1
+    intercept, home = params[0], params[1]
+    attack = np.append(params[2:2 + n], -params[2:2 + n].sum())
+    defence = np.append(params[2 + n:2 + 2 * n], -params[2 + n:2 + 2 * n].sum())
+
+    log_lam = intercept + home + attack[home_idx] - defence[away_idx]
+    log_mu = intercept + attack[away_idx] - defence[home_idx]
+    lam, mu = np.exp(log_lam), np.exp(log_mu)
+
+    log_lik = weights * (home_goals * log_lam - lam + away_goals * log_mu - mu)
+    grad_lam = weights * (home_goals - lam)
+    grad_mu = weights * (away_goals - mu)
+    grad_rho = 0.0
+
+    if dixon_coles:
+        rho = params[-1]
+        low = (home_goals <= 1) & (away_goals <= 1)
+        x, y, l, m, w = home_goals[low], away_goals[low], lam[low], mu[low], weights[low]
+
+        # Low-score correction factor tau and its derivatives with respect to log(lambda), log(mu) and rho
+        tau = np.ones_like(l)
+        d_lam, d_mu, d_rho = np.zeros_like(l), np.zeros_like(l), np.zeros_like(l)
+        m00, m01, m10, m11 = (x == 0) & (y == 0), (x == 0) & (y == 1), (x == 1) & (y == 0), (x == 1) & (y == 1)
+        tau[m00] = 1 - l[m00] * m[m00] * rho
+        d_lam[m00] = d_mu[m00] = -l[m00] * m[m00] * rho
+        d_rho[m00] = -l[m00] * m[m00]
+        tau[m01] = 1 + l[m01] * rho
+        d_lam[m01] = l[m01] * rho
+        d_rho[m01] = l[m01]
+        tau[m10] = 1 + m[m10] * rho
+        d_mu[m10] = m[m10] * rho
+        d_rho[m10] = m[m10]
+        tau[m11] = 1 - rho
+        d_rho[m11] = -1.0
+        # Where tau is clipped the objective is flat, so its derivatives are zero
+        clipped = tau < _MIN_TAU
+        d_lam[clipped] = d_mu[clipped] = d_rho[clipped] = 0.0
+        tau = np.maximum(tau, _MIN_TAU)
+
+        log_lik[low] += w * np.log(tau)
+        grad_lam[low] += w * d_lam / tau
+        grad_mu[low] += w * d_mu / tau
+        grad_rho = np.sum(w * d_rho / tau)
+
+    grad_attack = np.bincount(home_idx, grad_lam, n_teams) + np.bincount(away_idx, grad_mu, n_teams)
+    grad_defence = -np.bincount(away_idx, grad_lam, n_teams) - np.bincount(home_idx, grad_mu, n_teams)
+
+    grad = np.concatenate([
+        [np.sum(grad_lam) + np.sum(grad_mu), np.sum(grad_lam)],
+        grad_attack[:-1] - grad_attack[-1],
+        grad_defence[:-1] - grad_defence[-1],
+        [grad_rho] if dixon_coles else [],
+    ])
+
+    penalty = 0.5 * ridge * (np.sum(attack ** 2) + np.sum(defence ** 2))
+    grad_penalty = np.zeros_like(grad)
+    grad_penalty[2:2 + n] = ridge * (attack[:-1] - attack[-1])
+    grad_penalty[2 + n:2 + 2 * n] = ridge * (defence[:-1] - defence[-1])
+
+    total_weight = np.sum(weights)
+    return (penalty - np.sum(log_lik)) / total_weight, (grad_penalty - grad) / total_weight
+
+def fit_goal_model(df: pd.DataFrame, dixon_coles: bool = False, xi: float = 0.0, reference_date: str | pd.Timestamp | None = None, ridge: float = 0.1) -> dict:
+
+    """
+    Fits a team attack/defence goal model: independent Poisson goals with an optional Dixon-Coles low-score correction.
+
+    The expected goals are log(home goals) = intercept + home advantage + attack(home team) - defence(away team) and
+    log(away goals) = intercept + attack(away team) - defence(home team). The model is fitted by maximizing the
+    (optionally time-weighted) log-likelihood minus a ridge penalty on the ratings with L-BFGS-B using its analytic gradient.
+    The penalty keeps the ratings finite for teams that did not score or concede in the data.
+
+    Args:
+        df (pd.DataFrame): DataFrame containing match data with 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG' columns, and 'Date' when xi > 0 or reference_date is given
+        dixon_coles (bool): apply the Dixon-Coles correction for the 0-0, 1-0, 0-1 and 1-1 scorelines, default is False
+        xi (float): time-decay rate per day, each match is weighted by exp(-xi * days before reference_date), default is 0.0 (no decay)
+        reference_date (str | pd.Timestamp): date the model is fitted as of, default is the last match date.
+            When it is given or xi > 0, matches after this date and matches whose 'Date' cannot be parsed are left out of the fit
+        ridge (float): strength of the penalty 0.5 * ridge * (sum of squared attack and defence ratings), in units of match weight, default is 0.1
+
+    Returns:
+        dict: a dictionary containing the fitted model, structured as:
+            {
+                'teams': np.ndarray,
+                'attack': pd.Series,
+                'defence': pd.Series,
+                'intercept': float,
+                'home_advantage': float,
+                'rho': float,
+                'log_likelihood': float,  # weighted log-likelihood of the fitted parameters, without the penalty
+                'converged': bool
+            }
+
+    Raises:
+        ValueError: if the required columns are missing or fewer than two teams are present
+    """
+    uses_dates = xi > 0 or reference_date is not None
+    required_columns = ['HomeTeam', 'AwayTeam', 'FTHG', 'FTAG'] + (['Date'] if uses_dates else [])
+    missing_columns = [col for col in required_columns if col not in df.columns]
+    if missing_columns:
+        raise ValueError(f"Missing required columns: {missing_columns}")
+
+    df = df.dropna(subset=['HomeTeam', 'AwayTeam', 'FTHG', 'FTAG'])
+    if uses_dates:
+        # The fit is "as of" the reference date: undated matches and matches played after it are left out
+        dates = _match_dates(df)
+        reference = dates.max() if reference_date is None else pd.Timestamp(reference_date)
+        keep = (dates.notna() & (dates <= reference)).to_numpy()
+        df, dates = df[keep], dates[keep]
+    teams = get_all_teams(df)
+    if len(teams) < 2:
+        raise ValueError("At least two teams are required to fit the goal model.")
+    if ridge < 0:
+        raise ValueError("ridge must not be negative.")
+
+    home_idx = np.searchsorted(teams, df['HomeTeam'].astype(str).to_numpy())
+    away_idx = np.searchsorted(teams, df['AwayTeam'].astype(str).to_numpy())
+    home_goals = df['FTHG'].to_numpy(dtype=float)
+    away_goals = df['FTAG'].to_numpy(dtype=float)
+
+    weights = np.ones(len(df))
+    if xi > 0:
+        weights = np.exp(-xi * (reference - dates).dt.days.to_numpy(dtype=float))
+
+    n = len(teams) - 1
+    initial = np.zeros(2 + 2 * n + (1 if dixon_coles else 0))
+    initial[0] = np.log(max(np.average(np.concatenate([home_goals, away_goals]), weights=np.concatenate([weights, weights])), 1e-3))
+    bounds = [(None, None)] * (2 + 2 * n) + ([(-0.5, 0.5)] if dixon_coles else [])
+
+    result = minimize(
+        _goal_model_objective, initial, jac=True, method="L-BFGS-B", bounds=bounds,
+        args=(home_idx, away_idx, home_goals, away_goals, weights, len(teams), dixon_coles, ridge)
+    )
+
+    params = result.x
+    objective, _ = _goal_model_objective(params, home_idx, away_idx, home_goals, away_goals, weights, len(teams), dixon_coles)
+    log_likelihood = -objective * np.sum(weights) - np.sum(weights * (gammaln(home_goals + 1) + gammaln(away_goals + 1)))
+    attack = np.append(params[2:2 + n], -params[2:2 + n].sum())
+    defence = np.append(params[2 + n:2 + 2 * n], -params[2 + n:2 + 2 * n].sum())
+
+    return {
+        "teams": teams,
+        "attack": pd.Series(attack, index=teams, name="Attack"),
+        "defence": pd.Series(defence, index=teams, name="Defence"),
+        "intercept": float(params[0]),
+        "home_advantage": float(params[1]),
+        "rho": float(params[-1]) if dixon_coles else 0.0,
+        "log_likelihood": float(log_likelihood),
+        "converged": bool(result.success)
+    }
+
+def scoreline_probabilities(model: dict, home_teams, away_teams, max_goals: int = 10) -> np.ndarray:
+
+    """
+    Computes the scoreline probability matrices of a batch of fixtures with a fitted goal model.
+
+    Args:
+        model (dict): goal model returned by `fit_goal_model()`
+        home_teams (array-like): names of the home teams
+        away_teams (array-like): names of the away teams, in the same order as home_teams
+        max_goals (int): highest number of goals per team in the matrices, default is 10
+
+    Returns:
+        np.ndarray: array of shape (fixtures, max_goals + 1, max_goals + 1), where element [f, i, j] is the probability that fixture f ends i-j (home-away)
+
+    Raises:
+        ValueError: if a team is not part of the model or the two team lists differ in length
+    """
+    home_teams = np.asarray(home_teams, dtype=str)
+    away_teams = np.asarray(away_teams, dtype=str)
+    if home_teams.shape != away_teams.shape:
+        raise ValueError("home_teams and away_teams must have the same length.")
+
+    missing_teams = np.setdiff1d(np.union1d(home_teams, away_teams), model["teams"])
+    if len(missing_teams):
+        raise ValueError(f"Teams not found in the model: {list(missing_teams)}")
+
+    attack, defence = model["attack"], model["defence"]
+    lam = np.exp(model["intercept"] + model["home_advantage"] + attack[home_teams].to_numpy() - defence[away_teams].to_numpy())
+    mu = np.exp(model["intercept"] + attack[away_teams].to_numpy() - defence[home_teams].to_numpy())
+
+    goals = np.arange(max_goals + 1)
+    probs = poisson.pmf(goals[None, :, None], lam[:, None, None]) * poisson.pmf(goals[None, None, :], mu[:, None, None])
+
+    rho = model["rho"]
+    if rho != 0.0:
+        # Same clipping as in the fit, so strong teams with a large rho cannot get negative probabilities
+        probs[:, 0, 0] *= np.maximum(1 - lam * mu * rho, _MIN_TAU)
+        probs[:, 0, 1] *= np.maximum(1 + lam * rho, _MIN_TAU)
+        probs[:, 1, 0] *= np.maximum(1 + mu * rho, _MIN_TAU)
+        probs[:, 1, 1] *= np.maximum(1 - rho, _MIN_TAU)
+
+    return probs
+
+def goal_market_probabilities(scorelines: np.ndarray, totals: tuple[float, ...] = (2.5,), handicaps: tuple[float, ...] = ()) -> pd.DataFrame:
+
+    """
+    Derives match result, total goals and handicap probabilities from scoreline probability matrices.
+
+    Args:
+        scorelines (np.ndarray): array of shape (fixtures, max_goals + 1, max_goals + 1) returned by `scoreline_probabilities()`
+        totals (tuple[float]): total goals lines, e.g. 2.5 for the 'B365>2.5' and 'B365<2.5' odds, default is (2.5,)
+        handicaps (tuple[float]): home team handicap lines, e.g. the 'AHh' column, default is no handicaps
+
+    Returns:
+        pd.DataFrame: one row per fixture with the columns
+            - 'HomeWin', 'Draw', 'AwayWin': match result probabilities
+            - 'Over<line>', 'Under<line>': probability of more/fewer goals than each total line
+            - 'AH<line>_Home', 'AH<line>_Away': probability that the home/away team wins with the handicap applied
+            - 'AH<line>_Push': probability of a refund, only for whole-goal lines
+
+    Raises:
+        ValueError: if a handicap line is not a whole or half goal (quarter lines are split between two bets)
+    """
+    split_lines = [line for line in handicaps if not float(2 * line).is_integer()]
+    if split_lines:
+        raise ValueError(f"Handicap lines must be whole or half goals: {split_lines}")
+
+    n_fixtures, size = scorelines.shape[0], scorelines.shape[1]
+    flat = scorelines.reshape(n_fixtures, -1)
+    home_goals, away_goals = np.indices((size, size)).reshape(2, -1)
+
+    # Distributions of the goal difference (from -max_goals to max_goals) and the total goals, in one matrix product each
+    differences = np.arange(-(size - 1), size)
+    diff_dist = flat @ (home_goals - away_goals == differences[:, None]).T
+    total_goals = np.arange(2 * size - 1)
+    total_dist = flat @ (home_goals + away_goals == total_goals[:, None]).T
+
+    result = {
+        "HomeWin": diff_dist[:, differences > 0].sum(axis=1),
+        "Draw": diff_dist[:, differences == 0].sum(axis=1),
+        "AwayWin": diff_dist[:, differences < 0].sum(axis=1)
+    }
+    for line in totals:
+        result[f"Over{line:g}"] = total_dist[:, total_goals > line].sum(axis=1)
+        result[f"Under{line:g}"] = total_dist[:, total_goals < line].sum(axis=1)
+    for line in handicaps:
+        adjusted = differences + line
+        result[f"AH{line:+g}_Home"] = diff_dist[:, adjusted > 0].sum(axis=1)
+        result[f"AH{line:+g}_Away"] = diff_dist[:, adjusted < 0].sum(axis=1)
+        if float(line).is_integer():
+            result[f"AH{line:+g}_Push"] = diff_dist[:, adjusted == 0].sum(axis=1)
+
+    return pd.DataFrame(result)
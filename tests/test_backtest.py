@@ -0,0 +1,76 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import pyTSPA
+from pyTSPA.backtest import _matchdays
+from pyTSPA.features import _match_dates
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "EPL_23_24.csv")
+
+@pytest.fixture
+def season():
+    df = pyTSPA.load_match_data(DATA_PATH)
+    dates = _match_dates(df)
+    return df.iloc[np.argsort(dates.to_numpy(), kind="stable")].reset_index(drop=True)
+
+def test_matchdays_start_with_opening_round(season):
+    matchdays = _matchdays(season, [])
+    assert (matchdays[:10] == 1).all()
+    assert matchdays.max() == 38
+    assert np.bincount(matchdays)[1:].sum() == len(season)
+
+def test_matchday_folds_are_ordered_by_date(season):
+    result = pyTSPA.walk_forward_backtest(season, step=5, workers=1)
+    folds = result["folds"]
+    assert folds["TestMatches"].iloc[:-1].between(40, 60).all()
+    assert (folds["TestStart"].iloc[1:].to_numpy() > folds["TestEnd"].iloc[:-1].to_numpy()).all()
+
+    predictions = result["predictions"]
+    fold_dates = predictions.groupby("Fold")["Date"].agg(["min", "max"])
+    assert (fold_dates["min"].iloc[1:].to_numpy() > fold_dates["max"].iloc[:-1].to_numpy()).all()
+
+def test_matchday_folds_require_season_for_several_seasons(season):
+    next_season = season.copy()
+    next_season["Date"] = _match_dates(season) + pd.Timedelta(days=365)
+    two_seasons = pd.concat([season, next_season], ignore_index=True)
+    with pytest.raises(ValueError):
+        pyTSPA.walk_forward_backtest(two_seasons, workers=1)
+
+    two_seasons["Season"] = np.repeat(["2022-23", "2023-24"], len(season))
+    result = pyTSPA.walk_forward_backtest(two_seasons, step=19, workers=1)
+    assert len(result["folds"]) == 3
+    assert result["folds"]["TestStart"].iloc[1] == next_season["Date"].min()
+
+def test_goal_model_backtest_with_small_first_window(season):
+    for step in (1, 5):
+        result = pyTSPA.walk_forward_backtest(season, model="goal_model", step=step, workers=1)
+        probs = result["predictions"][["HomeWin", "Draw", "AwayWin"]].to_numpy()
+        assert np.isfinite(probs).all()
+        assert np.allclose(probs.sum(axis=1), 1.0)
+        assert np.isfinite(result["folds"][["LogLoss", "Brier", "CalibrationError"]].to_numpy()).all()
+
+def test_invalid_probabilities_are_rejected(season):
+    with pytest.raises(ValueError):
+        pyTSPA.walk_forward_backtest(season, model=_nan_model, step=19, workers=1)
+
+def _nan_model(train, test, feature_columns):
+    return np.full((len(test), 3), np.nan)
+
+def test_logistic_regression_tests_on_real_matches_only(season):
+    result = pyTSPA.logistic_regression_prediction(season)
+    predictions = result["predictions"]
+    # SMOTE only resamples the training split, so the test set is 30% of the real matches
+    assert len(predictions) == int(np.ceil(0.3 * len(season)))
+    actual = predictions["Actual"].map({2: "H", 1: "D", 0: "A"}).value_counts()
+    assert (actual <= season["FTR"].value_counts().reindex(actual.index)).all()
+
+def test_matchday_folds_with_several_divisions_are_ordered_by_date(season):
+    second_division = season.assign(Div="E1", Date=_match_dates(season) + pd.Timedelta(days=3))
+    second_division[["HomeTeam", "AwayTeam"]] = "E1 " + second_division[["HomeTeam", "AwayTeam"]]
+    divisions = pd.concat([season, second_division], ignore_index=True)
+    result = pyTSPA.walk_forward_backtest(divisions, step=5, workers=1)
+
+    fold_dates = result["predictions"].groupby("Fold")["Date"].agg(["min", "max"])
+    assert (fold_dates["min"].iloc[1:].to_numpy() > fold_dates["max"].iloc[:-1].to_numpy()).all()
+    assert set(result["predictions"]["HomeTeam"].str.startswith("E1 ")) == {True, False}
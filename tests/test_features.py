@@ -0,0 +1,66 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import pyTSPA
+from pyTSPA.features import _match_dates
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "EPL_23_24.csv")
+
+@pytest.fixture
+def season():
+    df = pyTSPA.load_match_data(DATA_PATH)
+    return df.iloc[np.argsort(_match_dates(df).to_numpy(), kind="stable")].reset_index(drop=True)
+
+def _points(row, team):
+    if row['FTR'] == 'D':
+        return 1
+    return 3 if (row['FTR'] == 'H') == (row['HomeTeam'] == team) else 0
+
+def test_features_match_per_match_calculation(season):
+    window = 3
+    features = pyTSPA.build_prematch_features(season, window=window)
+    dates = _match_dates(season)
+    for i in [0, 50, 200, 379]:
+        row = season.iloc[i]
+        team = row['HomeTeam']
+        earlier = season[dates < dates.iloc[i]]
+        played = earlier[(earlier['HomeTeam'] == team) | (earlier['AwayTeam'] == team)]
+        last = played.tail(window)
+
+        assert features.loc[i, 'Home_MatchesPlayed'] == len(played)
+        assert np.isclose(features.loc[i, 'Home_WinPercentage'], pyTSPA.win_percentage(earlier, team))
+        expected_pyth = pyTSPA.pythagorean_expectation(earlier, team) if len(played) else 0.5
+        assert np.isclose(features.loc[i, 'Home_PythagoreanExpectation'], expected_pyth)
+        expected_form = np.mean([_points(r, team) for _, r in last.iterrows()]) if len(last) else 0.0
+        assert np.isclose(features.loc[i, 'Home_Form'], expected_form)
+        expected_shots = np.mean([r['HS'] if r['HomeTeam'] == team else r['AS'] for _, r in last.iterrows()]) if len(last) else 0.0
+        assert np.isclose(features.loc[i, 'Home_AvgShots'], expected_shots)
+
+def test_incremental_updates_match_full_build(season):
+    two_seasons = pd.concat([
+        season.assign(Season="2022-23"),
+        season.assign(Season="2023-24", Date=_match_dates(season) + pd.Timedelta(days=365))
+    ], ignore_index=True)
+    full = pyTSPA.build_prematch_features(two_seasons, group_cols=['Season'])
+
+    builder = pyTSPA.PreMatchFeatureBuilder(group_cols=['Season'])
+    parts = [builder.update(two_seasons.iloc[start:stop]) for start, stop in [(0, 100), (100, 450), (450, 760)]]
+    incremental = pd.concat(parts)
+    np.testing.assert_allclose(incremental[builder.feature_columns].to_numpy(), full[builder.feature_columns].to_numpy())
+
+    with pytest.raises(ValueError):
+        builder.update(two_seasons.iloc[:10])
+
+def test_group_cols_restart_cumulative_features(season):
+    two_seasons = pd.concat([
+        season.assign(Season="2022-23"),
+        season.assign(Season="2023-24", Date=_match_dates(season) + pd.Timedelta(days=365))
+    ], ignore_index=True)
+    per_season = pyTSPA.build_prematch_features(two_seasons, group_cols=['Season'])
+    whole_history = pyTSPA.build_prematch_features(two_seasons)
+
+    columns = ['Home_MatchesPlayed', 'Home_WinPercentage', 'Home_PythagoreanExpectation']
+    np.testing.assert_allclose(per_season.iloc[380:][columns].to_numpy(), per_season.iloc[:380][columns].to_numpy())
+    assert (per_season.iloc[380:390]['Home_MatchesPlayed'] == 0).all()
+    assert (whole_history.iloc[380:390]['Home_MatchesPlayed'] == 38).all()
@@ -0,0 +1,81 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.optimize import approx_fprime
+import pyTSPA
+from pyTSPA.features import _match_dates
+from pyTSPA.metrics import _goal_model_objective
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "EPL_23_24.csv")
+
+@pytest.fixture
+def season():
+    return pyTSPA.load_match_data(DATA_PATH)
+
+def _objective_args(df, dixon_coles, ridge):
+    teams = pyTSPA.get_all_teams(df)
+    return (
+        np.searchsorted(teams, df['HomeTeam']), np.searchsorted(teams, df['AwayTeam']),
+        df['FTHG'].to_numpy(dtype=float), df['FTAG'].to_numpy(dtype=float),
+        np.random.default_rng(0).uniform(0.5, 1.0, len(df)), len(teams), dixon_coles, ridge
+    )
+
+@pytest.mark.parametrize("dixon_coles", [False, True])
+def test_gradient_matches_finite_differences(season, dixon_coles):
+    args = _objective_args(season, dixon_coles, 0.5)
+    n_params = 2 + 2 * (args[5] - 1) + (1 if dixon_coles else 0)
+    params = np.random.default_rng(1).normal(0.0, 0.2, n_params)
+    if dixon_coles:
+        params[-1] = -0.1
+
+    _, gradient = _goal_model_objective(params, *args)
+    numeric = approx_fprime(params, lambda p: _goal_model_objective(p, *args)[0], 1e-7)
+    np.testing.assert_allclose(gradient, numeric, atol=1e-5)
+
+def test_gradient_is_zero_where_tau_is_clipped(season):
+    args = _objective_args(season, True, 0.0)
+    n_params = 2 + 2 * (args[5] - 1) + 1
+    params = np.zeros(n_params)
+    params[0], params[-1] = 1.5, 0.5  # lam * mu * rho > 1 for every 0-0 match
+
+    _, gradient = _goal_model_objective(params, *args)
+    assert np.all(np.isfinite(gradient))
+    assert np.abs(gradient).max() < 1e3
+
+def test_fit_ignores_matches_after_reference_date(season):
+    dates = _match_dates(season)
+    reference = pd.Timestamp("2023-01-31")
+    as_of = pyTSPA.fit_goal_model(season, xi=0.01, reference_date=reference)
+    subset = pyTSPA.fit_goal_model(season[dates <= reference], xi=0.01, reference_date=reference)
+    assert np.isfinite(as_of["log_likelihood"])
+    assert np.isclose(as_of["log_likelihood"], subset["log_likelihood"])
+    pd.testing.assert_series_equal(as_of["attack"], subset["attack"])
+
+@pytest.mark.parametrize("dixon_coles", [False, True])
+def test_scoreline_and_market_probabilities_sum_to_one(season, dixon_coles):
+    model = pyTSPA.fit_goal_model(season, dixon_coles=dixon_coles)
+    scorelines = pyTSPA.scoreline_probabilities(model, season['HomeTeam'], season['AwayTeam'], max_goals=15)
+    assert scorelines.shape == (len(season), 16, 16)
+    assert (scorelines >= 0).all()
+    np.testing.assert_allclose(scorelines.sum(axis=(1, 2)), 1.0, atol=1e-4)
+
+    markets = pyTSPA.goal_market_probabilities(scorelines, totals=(1.5, 2.5), handicaps=(-1.5, -1, 0, 0.5))
+    groups = [
+        ["HomeWin", "Draw", "AwayWin"],
+        ["Over1.5", "Under1.5"],
+        ["Over2.5", "Under2.5"],
+        ["AH-1.5_Home", "AH-1.5_Away"],
+        ["AH-1_Home", "AH-1_Away", "AH-1_Push"],
+        ["AH+0_Home", "AH+0_Away", "AH+0_Push"],
+        ["AH+0.5_Home", "AH+0.5_Away"],
+    ]
+    for columns in groups:
+        np.testing.assert_allclose(markets[columns].sum(axis=1), 1.0, atol=1e-4)
+    np.testing.assert_allclose(markets["AH+0_Home"], markets["HomeWin"])
+
+def test_market_probabilities_reject_quarter_lines(season):
+    model = pyTSPA.fit_goal_model(season)
+    scorelines = pyTSPA.scoreline_probabilities(model, ["Arsenal"], ["Chelsea"])
+    with pytest.raises(ValueError):
+        pyTSPA.goal_market_probabilities(scorelines, handicaps=(-0.25,))
@@ -0,0 +1,34 @@
+import os
+import numpy as np
+import pandas as pd
+import pyTSPA
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "EPL_23_24.csv")
+
+def _two_seasons() -> pd.DataFrame:
+    df = pyTSPA.load_match_data(DATA_PATH)
+    return pd.concat([df.assign(Season="2022-23"), df.assign(Season="2023-24").iloc[:200]], ignore_index=True)
+
+def test_compute_by_group_serial_matches_parallel():
+    df = _two_seasons()
+    serial = pyTSPA.compute_by_group(df, workers=1)
+    parallel = pyTSPA.compute_by_group(df, workers=2)
+    pd.testing.assert_frame_equal(serial, parallel)
+
+def test_compute_by_group_matches_single_group():
+    df = _two_seasons()
+    result = pyTSPA.compute_by_group(df, metrics=["each_team_performance"], workers=1)
+    group = result[result["Season"] == "2023-24"].drop(columns=["Div", "Season"])
+    expected = pyTSPA.each_team_performance(df[df["Season"] == "2023-24"])
+    pd.testing.assert_frame_equal(
+        group.sort_values(by="Team").reset_index(drop=True),
+        expected.sort_values(by="Team").reset_index(drop=True),
+        check_dtype=False
+    )
+
+def test_compute_by_group_keeps_missing_group_values():
+    df = _two_seasons()
+    df.loc[:5, "Season"] = np.nan
+    result = pyTSPA.compute_by_group(df, metrics=["each_win_percentage"], workers=1)
+    assert result["Season"].isna().any()
+    assert set(result["Season"].dropna()) == {"2022-23", "2023-24"}